@@ -1,10 +1,19 @@
 """缓存相关接口"""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from bisect import bisect_left, insort
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any, ClassVar, Optional
 
 from .config import BaseConfig
 
+try:
+    import aioredis  # type: ignore
+except Exception:  # pragma: no cover
+    # aioredis 为可选依赖，且在 Python 3.11+ 上导入即报错
+    aioredis = None  # type: ignore
+
 
 class Cache(ABC):
     @abstractmethod
@@ -50,13 +59,35 @@ class Cache(ABC):
         pass
 
 
+class PubSubCache(Cache):
+    """支持跨进程发布/订阅的缓存"""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Any) -> None:
+        """
+        向频道发布消息。
+        """
+        pass
+
+    @abstractmethod
+    def psubscribe(self, pattern: str) -> AsyncIterator[tuple[str, Any]]:
+        """
+        按模式订阅频道，逐条返回 (channel, message)。
+        """
+        pass
+
+
 class LocalCache(Cache):
     """Dict 模拟缓存操作"""
 
     def __init__(self):
         self._store: dict[str, Any] = {}
+        # 有序 key 索引，用于前缀匹配时二分查找
+        self._sorted_keys: list[str] = []
 
     async def set(self, key: str, value: Any, ex: int | None = None) -> None:
+        if key not in self._store:
+            insort(self._sorted_keys, key)
         self._store[key] = value
 
     async def get(self, key: str) -> Any:
@@ -68,6 +99,7 @@ class LocalCache(Cache):
     async def delete(self, key: str) -> None:
         if key in self._store:
             del self._store[key]
+            del self._sorted_keys[bisect_left(self._sorted_keys, key)]
 
     async def keys(self, pattern: str = "*") -> list[str]:
         if pattern == "*":
@@ -75,11 +107,18 @@ class LocalCache(Cache):
         else:
             if pattern.endswith("*"):
                 prefix = pattern[:-1]
-                return [k for k in self._store if k.startswith(prefix)]
-            return [k for k in self._store if k == pattern]
+                sorted_keys = self._sorted_keys
+                result = []
+                i = bisect_left(sorted_keys, prefix)
+                while i < len(sorted_keys) and sorted_keys[i].startswith(prefix):
+                    result.append(sorted_keys[i])
+                    i += 1
+                return result
+            return [pattern] if pattern in self._store else []
 
     async def close(self) -> None:
         self._store.clear()
+        self._sorted_keys.clear()
 
 
 class RedisConfig(BaseConfig):
@@ -92,6 +131,12 @@ class RedisConfig(BaseConfig):
     db: int = 0
     password: str | None = None
     encoding: str = "utf-8"
+    # SCAN 每批返回的 key 数量提示，Redis 默认值 10 过小
+    scan_count: int = 500
+    # 连接池最大连接数（含终止通知订阅常驻占用的 1 个连接）
+    max_connections: int = 32
+    # 连接池耗尽时等待空闲连接的秒数，超时后抛出异常
+    pool_timeout: float = 5.0
 
     @classmethod
     def from_yaml(cls, path: str | None = None) -> "RedisConfig":
@@ -102,78 +147,120 @@ class RedisConfig(BaseConfig):
         return super().from_yaml_dict(path)
 
 
-class RedisCache(Cache):
+class RedisCache(PubSubCache):
     """Redis 缓存实现（基于 aioredis）"""
 
-    _instance = None
-
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    # 进程内共享的实例，由 get_or_create 创建，close 时清除
+    _shared: ClassVar[Optional["RedisCache"]] = None
 
     def __init__(self, config: Optional["RedisConfig"] = None):
-        if hasattr(self, "_initialized") and self._initialized:
-            return
-        self._redis = None
-        self._initialized = False
-        self._config = config
+        if not config:
+            raise ValueError("RedisConfig not found.")
 
-        self.init()
+        if aioredis is None:
+            raise RuntimeError("aioredis not installed. Please install 'aioredis'.")
 
-    def init(self):
-        if not self._config:
-            raise ValueError("RedisConfig not found.")
+        self._config = config
+        self._redis = None
+        self._connect_lock = asyncio.Lock()
 
-        try:
-            import aioredis  # type: ignore
-        except Exception as e:
-            raise RuntimeError("aioredis not installed. Please install 'aioredis'.") from e
-
-        url = f"redis://{self._config.host}:{self._config.port}"
-        self._redis = aioredis.from_url(  # type: ignore[attr-defined]
-            url,
-            password=self._config.password,
-            db=self._config.db,
-            encoding=self._config.encoding,
-            decode_responses=True,
-        )
-        self._initialized = True
-
-    def _get_redis(self):
-        if not self._redis:
-            raise RuntimeError("RedisCache not init. Please await cache.init() first")
+    @classmethod
+    def get_or_create(cls, config: Optional["RedisConfig"] = None) -> "RedisCache":
+        """获取进程内共享的 RedisCache 实例，不存在时按 config 创建"""
+        if RedisCache._shared is None:
+            RedisCache._shared = cls(config=config)
+        return RedisCache._shared
+
+    async def init(self):
+        """创建连接池，首次访问 Redis 时自动调用"""
+        async with self._connect_lock:
+            if self._redis is None:
+                url = f"redis://{self._config.host}:{self._config.port}"
+                # 阻塞式连接池：连接用尽时排队等待空闲连接，而不是直接抛出 "Too many connections"
+                pool = aioredis.BlockingConnectionPool.from_url(  # type: ignore[attr-defined]
+                    url,
+                    password=self._config.password,
+                    db=self._config.db,
+                    encoding=self._config.encoding,
+                    decode_responses=True,
+                    max_connections=self._config.max_connections,
+                    timeout=self._config.pool_timeout,
+                )
+                self._redis = aioredis.Redis(connection_pool=pool)  # type: ignore[attr-defined]
         return self._redis
 
+    async def _get_redis(self):
+        redis = self._redis
+        if redis is None:
+            redis = await self.init()
+        return redis
+
     async def set(self, key: str, value: Any, ex: int | None = None) -> None:
-        redis = self._get_redis()
+        redis = await self._get_redis()
         if ex is not None:
             await redis.set(key, value, ex=ex)
         else:
             await redis.set(key, value)
 
     async def get(self, key: str) -> Any:
-        redis = self._get_redis()
+        redis = await self._get_redis()
         value = await redis.get(key)
         if isinstance(value, bytes):
             value = value.decode("utf-8")
         return value
 
     async def exists(self, key: str) -> bool:
-        redis = self._get_redis()
+        redis = await self._get_redis()
         value = await redis.exists(key)
         return bool(value)
 
     async def delete(self, key: str) -> None:
-        redis = self._get_redis()
+        redis = await self._get_redis()
         await redis.delete(key)
 
-    async def keys(self, pattern: str = "*") -> list[str]:
-        redis = self._get_redis()
-        return await redis.keys(pattern)
+    async def keys(self, pattern: str = "*", count: int | None = None) -> list[str]:
+        """基于 SCAN 获取匹配的 key，避免 KEYS 阻塞 Redis；按首次出现的顺序去重"""
+        return list(dict.fromkeys([key async for key in self.scan_iter(pattern, count=count)]))
+
+    async def scan_iter(
+        self, pattern: str = "*", count: int | None = None
+    ) -> AsyncGenerator[str, None]:
+        """以游标方式逐批迭代匹配的 key，适合可流式处理的调用方。
+
+        SCAN 不保证唯一性，遍历期间发生 rehash 等情况时同一个 key 可能被返回多次，
+        需要唯一结果时请使用 `keys()`。
+        """
+        redis = await self._get_redis()
+        count = count or self._config.scan_count
+        cursor = 0
+        while True:
+            cursor, batch = await redis.scan(cursor=cursor, match=pattern, count=count)
+            for key in batch:
+                yield key
+            if cursor == 0:
+                break
+
+    async def publish(self, channel: str, message: Any) -> None:
+        redis = await self._get_redis()
+        await redis.publish(channel, message)
+
+    async def psubscribe(self, pattern: str) -> AsyncGenerator[tuple[str, Any], None]:
+        redis = await self._get_redis()
+        pubsub = redis.pubsub()
+        await pubsub.psubscribe(pattern)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "pmessage":
+                    yield message["channel"], message["data"]
+        finally:
+            await pubsub.punsubscribe(pattern)
+            await pubsub.close()
 
     async def close(self) -> None:
         if self._redis:
             await self._redis.close()
+            # 显式传入的连接池不会随客户端关闭，需单独断开
+            await self._redis.connection_pool.disconnect()
             self._redis = None
-            self._initialized = False
+        if RedisCache._shared is self:
+            RedisCache._shared = None
@@ -3,17 +3,37 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
+from functools import cache
 from pathlib import Path
 from typing import Any, ClassVar
 
 import yaml
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 try:
     from loguru import logger  # type: ignore
 except Exception:  # pragma: no cover
     logger = None  # type: ignore
 
+try:
+    # 优先使用 libyaml 提供的 C 解析器
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as _YamlLoader  # type: ignore[assignment]
+
+# 已解析的 YAML 内容缓存，键为绝对路径，值为 (修改时间, 内容)；
+# 文件修改后重新解析并替换该路径的旧条目
+_YAML_CACHE: dict[Path, tuple[float, dict]] = {}
+
+
+def _load_yaml(cfg_path: Path) -> dict:
+    """解析 YAML 文件"""
+    try:
+        with open(cfg_path, "rb") as f:
+            return yaml.load(f, Loader=_YamlLoader) or {}
+    except yaml.YAMLError as e:
+        raise ValueError(f"配置文件 YAML 解析失败: {e}") from e
+
 
 class BaseConfig(BaseModel):
     """通用配置基类。
@@ -44,11 +64,17 @@ class BaseConfig(BaseModel):
             name_lower = name_lower[: -len("config")]
         return name_lower
 
+    @classmethod
+    @cache
+    def _allowed_fields(cls) -> frozenset[str]:
+        # model_fields 在类创建后不再变化，按类缓存一次即可
+        return frozenset(getattr(cls, "model_fields", {}))  # pydantic v2
+
     @classmethod
     def _filter_model_fields(cls, data: Mapping[str, Any] | None) -> dict:
         if not isinstance(data, Mapping):
             return {}
-        allowed = set(getattr(cls, "model_fields", {}).keys())  # pydantic v2
+        allowed = cls._allowed_fields()
 
         if not allowed:
             return dict(data)
@@ -64,17 +90,20 @@ class BaseConfig(BaseModel):
         - 否则读取顶层平铺字段；
         - 仅返回与当前模型字段同名的键值对。
         """
-        cfg_path = Path(path) if path else cls._default_config_path()
+        cfg_path = Path(path).resolve() if path else cls._default_config_path()
 
         try:
-            with open(cfg_path, encoding="utf-8") as f:
-                raw = yaml.safe_load(f) or {}
+            mtime = cfg_path.stat().st_mtime
+            cached = _YAML_CACHE.get(cfg_path)
+            if cached is not None and cached[0] == mtime:
+                raw = cached[1]
+            else:
+                raw = _load_yaml(cfg_path)
+                _YAML_CACHE[cfg_path] = (mtime, raw)
         except FileNotFoundError:
             if logger:
                 logger.debug(f"配置文件未找到: {cfg_path}. 将返回空配置以便使用环境变量/默认值。")
             return {}
-        except yaml.YAMLError as e:
-            raise ValueError(f"配置文件 YAML 解析失败: {e}") from e
 
         section = cls._infer_section_name()
         section_data = raw.get(section)
@@ -100,10 +129,34 @@ class DatabaseConfig(BaseConfig):
     """数据库连接配置"""
     mongo_uri: str
     db_name: str
+    # MongoClient 连接池上限
+    max_pool_size: int = 100
 
     # 指定在 config.yaml 中查找的节名
     yaml_section: ClassVar[str] = "database"
 
 
-# 创建一个全局的配置实例，方便其他模块直接导入使用
-db_config = DatabaseConfig.from_yaml()
+class CORSConfig(BaseConfig):
+    """跨域配置，节名 `cors`"""
+    origins: list[str] = ["http://localhost:8080", "http://127.0.0.1:8080"]
+
+    @field_validator("origins")
+    @classmethod
+    def validate_origins(cls, v: list[str]) -> list[str]:
+        # 仅做廉价的协议前缀检查，不逐项构建 URL 模型
+        for origin in v:
+            if origin != "*" and not origin.startswith(("http://", "https://")):
+                raise ValueError(f"invalid CORS origin: {origin}")
+        return v
+
+
+@cache
+def get_db_config() -> DatabaseConfig:
+    """获取全局数据库配置，首次调用时才读取 config.yaml"""
+    return DatabaseConfig.from_yaml()  # type: ignore[return-value]
+
+
+@cache
+def get_cors_config() -> CORSConfig:
+    """获取全局 CORS 配置，首次调用时才读取 config.yaml"""
+    return CORSConfig.from_yaml()  # type: ignore[return-value]
@@ -1,10 +1,9 @@
 """API 路由"""
+import asyncio
 import logging
 from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import RedirectResponse, StreamingResponse
 
-from src.cache import Cache
-from src.llm import LLMClient
 from src.response import ApiResponse
 from src.schema import Message
 from src.core.user import UserProfile, save_user_profile
@@ -15,21 +14,27 @@ from .dto import ChatRequest
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# 禁止反向代理（如 nginx）与客户端缓冲流式响应，保证逐条事件及时送达
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
-def get_qwq_client() -> LLMClient:
-    return LLMClient()
 
+def get_chat_service(request: Request) -> ChatService:
+    service = getattr(request.app.state, "chat_service", None)
+    if service is None:
+        raise RuntimeError("ChatService is not configured on app.state.chat_service")
+    return service
 
-def get_cache(request: Request) -> Cache:
-    cache = getattr(request.app.state, "cache", None)
-    if cache is None:
-        raise RuntimeError("Cache is not configured on app.state.cache")
-    return cache
+
+def get_rag_service(request: Request) -> RAGService:
+    service = getattr(request.app.state, "rag_service", None)
+    if service is None:
+        raise RuntimeError("RAGService is not configured on app.state.rag_service")
+    return service
 
 
 # Avoid calling Depends(...) inside default args (ruff B008)
-CACHE_DEP = Depends(get_cache)
-QWQ_LLM_DEP = Depends(get_qwq_client)
+CHAT_SERVICE_DEP = Depends(get_chat_service)
+RAG_SERVICE_DEP = Depends(get_rag_service)
 
 
 @router.get("/")
@@ -43,7 +48,8 @@ async def create_user(user_profile: UserProfile):
     接收前端发送的用户信息，验证后存入数据库
     """
     try:
-        user_id = save_user_profile(user_profile)
+        # pymongo 为同步驱动，放到线程池执行以免阻塞事件循环
+        user_id = await asyncio.to_thread(save_user_profile, user_profile)
         return {"status": "success", "user_id": str(user_id)}
     except Exception as e:
         logger.error(f"Error saving user profile: {e}", exc_info=True)
@@ -53,8 +59,8 @@ async def create_user(user_profile: UserProfile):
 @router.post("/v1/chat/completions")
 async def chat_completions(
     request: ChatRequest,
-    cache: Cache = CACHE_DEP,
-    llm_client: LLMClient = QWQ_LLM_DEP,
+    chat_service: ChatService = CHAT_SERVICE_DEP,
+    rag_service: RAGService = RAG_SERVICE_DEP,
 ):
     """
     对话补全接口，分为 RAG 启用/关闭两类
@@ -63,42 +69,35 @@ async def chat_completions(
     响应保证：单次请求中每条 JSON 结构是完整的.
     """
 
-    if request.rag_enable:
-        chat_service = RAGService(cache=cache, llm_client=llm_client)
-    else:
-        chat_service = ChatService(cache=cache, llm_client=llm_client)
+    service = rag_service if request.rag_enable else chat_service
 
-    async def stream_generator():
-        async for chunk in chat_service.generate(
-            chat_id=request.chat_id,
-            message_id=request.message_id,
-            messages=request.query,
-        ):
-            yield chunk
+    # generate() 产出的事件已是 UTF-8 bytes，直接交给 StreamingResponse
+    stream = service.generate(
+        chat_id=request.chat_id,
+        message_id=request.message_id,
+        messages=request.query,
+    )
 
     try:
-        return StreamingResponse(stream_generator(), media_type="text/event-stream")
+        return StreamingResponse(stream, media_type="text/event-stream", headers=STREAM_HEADERS)
     except Exception as e:
         return ApiResponse.fail(msg=str(e))
 
 
 @router.post("/v1/chat/halt")
-async def chat_halt(chat_id: str, cache: Cache = CACHE_DEP):
+async def chat_halt(chat_id: str, service: ChatService = CHAT_SERVICE_DEP):
     """
     会话终止接口，截断RAG的回答链路，以减小服务器端压力
 
     客户端接收到 /completions 里的 end 事件后，终止当前会话请求.
     """
-    service = ChatService(cache=cache)
     await service.halt_chat(chat_id)
     return ApiResponse.success(data={"chat_id": chat_id, "status": "halted"})
 
 
 @router.post("/v1/chat/summarize")
-async def chat_summarize(messages: list[Message], cache: Cache = CACHE_DEP):
+async def chat_summarize(messages: list[Message], service: ChatService = CHAT_SERVICE_DEP):
     """会话标题生成接口，为一段会话总结标题"""
-    service = ChatService(cache=cache)
-
     query = messages[-1].content
     title = await service.generate_chat_title(query)
 
@@ -1,14 +1,22 @@
 """会话管理"""
 
+import asyncio
+import hashlib
+import re
 from abc import ABC, abstractmethod
 from collections.abc import AsyncGenerator
+from functools import cache
+from pathlib import Path
+from typing import ClassVar
 
+import orjson
+from cachetools import TTLCache
 from loguru import logger
+from pydantic import BaseModel
 
-from src.cache import Cache
+from src.cache import Cache, PubSubCache
 from src.llm import LLMClient
 from src.schema import (
-    AnswerResponse,
     Attachment,
     Author,
     ChatStatus,
@@ -17,16 +25,49 @@ from src.schema import (
     EndResponse,
     InitResponse,
     Message,
-    QueryRewriteResponse,
     SearchResponse,
     Source,
+    answer_jsonl,
+    query_rewrite_jsonl,
 )
 
-from .prompt import QUERY_REWRITE_PROMPT, RAG_ANSWER_PROMPT
+from .prompt import query_rewrite_prompt, rag_answer_prompt
+
+# 跨进程终止通知的频道前缀，完整频道名为 `halt:{chat_id}`
+HALT_CHANNEL_PREFIX = "halt:"
+
+# 示例检索结果（mock predoc 服务），首次使用时解析并缓存
+_EXAMPLE_SEARCH_RESULT = Path(__file__).with_name("example_search_result.json")
+
+_THINK_END_TAG = re.compile("</think>", re.IGNORECASE)
+
+# 内部构造的提示词消息字段可信，使用 model_construct 跳过校验
+_USER_ROLE = "user"
+
+# 缓存中读出的 TERMINATED 状态：LocalCache 为 int，Redis 为 str
+_TERMINATED_VALUES = frozenset({ChatStatus.TERMINATED.value, str(ChatStatus.TERMINATED.value)})
+
+# 查询重写结果缓存（LRU + TTL），键为原始查询的 blake2b 摘要。
+# 读写均在事件循环线程内且中间没有 await，无需额外加锁
+_QUERY_REWRITE_CACHE: TTLCache[bytes, str] = TTLCache(maxsize=2048, ttl=3600)
 
 
 class ChatInterface(ABC):
-    """抽象的聊天接口层。"""
+    """抽象的聊天接口层。
+
+    流式输出过程中不再逐片段轮询缓存中的会话状态，而是检查进程内的终止事件：
+    本进程内的 halt 直接置位事件；缓存支持发布/订阅时，其他进程的 halt 经频道转发，
+    由每个进程唯一的后台监听任务置位对应事件；否则只能终止本进程内的生成，
+    其他进程的 halt 在开始生成前按缓存状态补齐。
+    """
+
+    # 进程内正在生成的会话及其终止事件，所有服务实例共享；
+    # 同一会话重新生成时登记新的事件，终止只作用于最新一次生成
+    _halt_events: ClassVar[dict[str, asyncio.Event]] = {}
+    _halt_listener: ClassVar[asyncio.Task | None] = None
+    # 终止通知订阅断开后的重试间隔（秒），按指数退避直到上限
+    halt_listener_retry_delay: ClassVar[float] = 0.5
+    halt_listener_max_retry_delay: ClassVar[float] = 30.0
 
     def __init__(self, cache: Cache, llm_client: LLMClient | None = None, **_):
         self.cache: Cache = cache
@@ -34,41 +75,126 @@ class ChatInterface(ABC):
 
     async def _set_chat_status(self, chat_id: str, status: ChatStatus):
         await self.cache.set(chat_id, status.value)
+        if status is ChatStatus.TERMINATED:
+            event = self._halt_events.get(chat_id)
+            if event is not None:
+                event.set()
+
+    def _ensure_halt_listener(self) -> None:
+        """缓存支持发布/订阅时，确保本进程有一个监听跨进程终止通知的后台任务"""
+        if not isinstance(self.cache, PubSubCache):
+            return
+        listener = ChatInterface._halt_listener
+        if listener is None or listener.done():
+            ChatInterface._halt_listener = asyncio.create_task(self._listen_halts(self.cache))
+
+    @classmethod
+    async def stop_halt_listener(cls) -> None:
+        """停止本进程的终止通知监听任务，应在关闭缓存之前调用"""
+        listener = ChatInterface._halt_listener
+        ChatInterface._halt_listener = None
+        if listener is None or listener.done():
+            return
+        listener.cancel()
+        try:
+            await listener
+        except asyncio.CancelledError:
+            pass
+
+    @classmethod
+    async def _listen_halts(cls, cache: PubSubCache) -> None:
+        """订阅终止通知并置位对应事件，订阅出错时按指数退避重新订阅"""
+        delay = cls.halt_listener_retry_delay
+        while True:
+            try:
+                async for channel, _ in cache.psubscribe(f"{HALT_CHANNEL_PREFIX}*"):
+                    delay = cls.halt_listener_retry_delay
+                    event = cls._halt_events.get(channel[len(HALT_CHANNEL_PREFIX) :])
+                    if event is not None:
+                        event.set()
+                logger.warning(f"Halt subscription closed, resubscribing in {delay:.1f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Halt listener failed: {e}, resubscribing in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, cls.halt_listener_max_retry_delay)
+            # 断线期间发布的终止通知已经丢失，重新订阅前按缓存状态补齐
+            await cls._sync_halts_from_cache(cache)
+
+    @classmethod
+    async def _sync_halts_from_cache(cls, cache: Cache) -> None:
+        """按缓存中的会话状态置位已被终止的会话事件"""
+        for chat_id, event in list(cls._halt_events.items()):
+            try:
+                if not event.is_set() and await cache.get(chat_id) in _TERMINATED_VALUES:
+                    event.set()
+            except Exception as e:
+                logger.warning(f"Failed to sync halt status of chat {chat_id}: {e}")
+                return
 
     async def generate(
         self, chat_id: str, message_id: str, messages: list[Message] | None = None
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """
         生成流式会话, 标记会话初始化与结束阶段，
         内部业务 `chat_workflow` 在子类实现
         """
         init_resp = InitResponse.create(chat_id=chat_id, message_id=message_id)
 
-        if chat_id and self.cache:
-            await self._set_chat_status(chat_id, ChatStatus.ACTIVE)
-
-        yield init_resp.to_jsonl()
+        # 先登记终止事件与监听任务，再标记 ACTIVE，保证此后到达的 halt 都能置位事件。
+        # 每次生成使用新的事件：同一会话被终止后重新生成时，不能沿用已置位的旧事件
+        halt_event = self._halt_events[chat_id] = asyncio.Event()
+        self._ensure_halt_listener()
 
         try:
-            async for res in self.chat_workflow(chat_id=chat_id, messages=messages):
-                if res is not None:
-                    yield res
-        except Exception as e:
-            logger.error(f"error: {e}")
-            await self._set_chat_status(chat_id, ChatStatus.TERMINATED)
-        finally:
-            chat_status = await self.cache.get(chat_id)
-            if str(chat_status) != str(ChatStatus.TERMINATED.value):
-                await self._set_chat_status(chat_id, ChatStatus.COMPLETED)
+            if chat_id and self.cache:
+                await self._set_chat_status(chat_id, ChatStatus.ACTIVE)
+
+            yield init_resp.to_jsonl()
+
+            # 跨进程的 halt 可能早于监听任务完成订阅，开始生成前按缓存状态补一次
+            if await self.cache.get(chat_id) in _TERMINATED_VALUES:
+                halt_event.set()
+
+            try:
+                async for res in self.chat_workflow(
+                    chat_id=chat_id, halt_event=halt_event, messages=messages
+                ):
+                    if res is not None:
+                        yield res
+            except Exception as e:
+                logger.error(f"error: {e}")
+                halt_event.set()
+                if self._halt_events.get(chat_id) is halt_event:
+                    await self.cache.set(chat_id, ChatStatus.TERMINATED.value)
+            finally:
+                if halt_event.is_set():
+                    chat_status = ChatStatus.TERMINATED.value
+                elif self._halt_events.get(chat_id) is not halt_event:
+                    # 会话已被新的生成接管，缓存中的状态归新的生成所有，不再回写
+                    chat_status = ChatStatus.COMPLETED.value
+                else:
+                    chat_status = await self.cache.get(chat_id)
+                    if chat_status not in _TERMINATED_VALUES:
+                        await self._set_chat_status(chat_id, ChatStatus.COMPLETED)
+                        # 刚写入的状态无需再次回读缓存
+                        chat_status = ChatStatus.COMPLETED.value
 
-        chat_status = await self.cache.get(chat_id)
-        yield EndResponse.from_status(chat_status).to_jsonl()
+            yield EndResponse.from_status(chat_status).to_jsonl()
+        finally:
+            if self._halt_events.get(chat_id) is halt_event:
+                del self._halt_events[chat_id]
 
     async def halt_chat(self, chat_id: str) -> None:
         if not chat_id:
             raise ValueError("Missing chat_id for halt operation")
         try:
             await self._set_chat_status(chat_id, ChatStatus.TERMINATED)
+            if isinstance(self.cache, PubSubCache):
+                await self.cache.publish(
+                    f"{HALT_CHANNEL_PREFIX}{chat_id}", ChatStatus.TERMINATED.value
+                )
             logger.info(f"Chat {chat_id} has been terminated")
         except Exception as e:
             logger.error(f"Failed to halt chat {chat_id}: {str(e)}")
@@ -81,9 +207,9 @@ class ChatInterface(ABC):
 
     @abstractmethod
     async def chat_workflow(
-        self, chat_id: str, messages: list[Message] | None = None
-    ) -> AsyncGenerator[str, None]:
-        """聊天工作流程，返回流式响应"""
+        self, chat_id: str, halt_event: asyncio.Event, messages: list[Message] | None = None
+    ) -> AsyncGenerator[bytes, None]:
+        """聊天工作流程，返回流式响应；`halt_event` 置位后应尽快结束"""
         raise NotImplementedError()
 
 
@@ -93,8 +219,8 @@ class ChatService(ChatInterface):
     """
 
     async def chat_workflow(
-        self, chat_id: str, messages: list[Message] | None = None
-    ) -> AsyncGenerator[str, None]:
+        self, chat_id: str, halt_event: asyncio.Event, messages: list[Message] | None = None
+    ) -> AsyncGenerator[bytes, None]:
         if not chat_id:
             raise ValueError("Missing chat_id for chat workflow")
 
@@ -103,12 +229,10 @@ class ChatService(ChatInterface):
                 raise ValueError("llm_client is not configured")
 
             async for chunk in self.llm_client.generate_stream(messages=messages):
-                chat_status = await self.cache.get(chat_id)
-                if str(chat_status) == str(ChatStatus.ACTIVE.value):
-                    yield AnswerResponse.from_text(chunk).to_jsonl()
-                else:
+                if halt_event.is_set():
                     yield None
                     break
+                yield answer_jsonl(chunk)
         except Exception as e:
             logger.error(f"生成流式答案时出错: {str(e)}")
             if self.cache:
@@ -121,40 +245,41 @@ class RAGService(ChatInterface):
     RAG 模式的聊天业务
     """
 
+    # 是否对检索结果做完整的 Pydantic 校验，默认信任内部检索服务返回的数据
+    validate_search_result: ClassVar[bool] = False
+
     def context_inject(self, origin_query: str, rewritten_query: str, context: list[Chunk]) -> str:
-        template = f"""用户原始问题：{origin_query}\n重写问题：{rewritten_query}\n上下文信息：\n"""
-        for chunk in context:
-            template += f"- {chunk.text}\n"
-        return template
+        body = "".join([f"- {chunk.text}\n" for chunk in context])
+        return f"用户原始问题：{origin_query}\n重写问题：{rewritten_query}\n上下文信息：\n{body}"
 
-    async def remove_think(self, text: str) -> str:
+    @staticmethod
+    def _remove_think(text: str) -> str:
         """去除</think>标签前的全部思考部分"""
-        idx = text.lower().find("</think>")
-        return text[idx + len("</think>") :] if idx != -1 else text
+        match = _THINK_END_TAG.search(text)
+        return text[match.end() :] if match else text
 
     async def chat_workflow(
-        self, chat_id: str, messages: list[Message] | None = None
-    ) -> AsyncGenerator[str, None]:
+        self, chat_id: str, halt_event: asyncio.Event, messages: list[Message] | None = None
+    ) -> AsyncGenerator[bytes, None]:
         if not chat_id:
             raise ValueError("Missing chat_id for chat workflow")
 
         try:
             if self.llm_client is None:
                 raise ValueError("llm_client is not configured")
+
             # STEP 1: Query rewrite
             origin_user_query = messages[0].content
-            rewritten_query = ""
+            rewritten_parts: list[str] = []
 
             async for chunk in self.query_rewrite(origin_user_query):
-                chat_status = await self.cache.get(chat_id)
-                if str(chat_status) == str(ChatStatus.ACTIVE.value):
-                    yield QueryRewriteResponse.from_text(chunk).to_jsonl()
-                    rewritten_query += chunk
-                else:
+                if halt_event.is_set():
                     yield None
                     break
+                yield query_rewrite_jsonl(chunk)
+                rewritten_parts.append(chunk)
 
-            rewritten_query = await self.remove_think(rewritten_query)
+            rewritten_query = self._remove_think("".join(rewritten_parts))
             # STEP 2: Search
             # use rewritten query to search relevant chunks
             attachment = await self.search_relevant_docs(rewritten_query)
@@ -163,19 +288,17 @@ class RAGService(ChatInterface):
             context = attachment.chunks
 
             prompt = self.context_inject(origin_user_query, rewritten_query, context)
-            final_query = RAG_ANSWER_PROMPT.format(context=prompt)
-            messages = [Message(role="user", content=final_query)]
+            final_query = rag_answer_prompt(prompt)
+            messages = [Message.model_construct(role=_USER_ROLE, content=final_query)]
 
             # logger.debug(f"Final RAG query: {final_query}")
 
             # STEP 3: Answer
             async for chunk in self.llm_client.generate_stream(messages=messages):
-                chat_status = await self.cache.get(chat_id)
-                if str(chat_status) == str(ChatStatus.ACTIVE.value):
-                    yield AnswerResponse.from_text(chunk).to_jsonl()
-                else:
+                if halt_event.is_set():
                     yield None
                     break
+                yield answer_jsonl(chunk)
         except Exception as e:
             logger.error(f"生成流式答案时出错: {str(e)}")
             if self.cache:
@@ -186,56 +309,79 @@ class RAGService(ChatInterface):
         """搜索相关文档"""
         # mock request to predoc server
         # TODO: config predoc project to make real API request
-        import json
-        import pathlib
-
-        with open(pathlib.Path(__file__).with_name("example_search_result.json")) as f:
-            example_json = json.load(f)
-
-            attachment_data = example_json.get("data", {})
-
-            docs = []
-            for doc_data in attachment_data.get("doc", []):
-                doc = Document(
-                    idx=doc_data.get("idx", 0),
-                    title=doc_data.get("title", ""),
-                    authors=[
-                        Author(
-                            name=author.get("name", ""),
-                            institution=author.get("institution", ""),
-                        )
-                        for author in doc_data.get("authors", [])
-                    ],
-                    publicationDate=doc_data.get("publicationDate", ""),
-                    language=doc_data.get("language", ""),
-                    keywords=doc_data.get("keywords", []),
-                    publisher=doc_data.get("publisher", ""),
-                    journal=doc_data.get("journal", ""),
-                )
-                docs.append(doc)
-
-            chunks = []
-            for chunk_data in attachment_data.get("chunks", []):
-                chunk = Chunk(
-                    id=chunk_data.get("id", 0),
-                    doc_id=chunk_data.get("doc_id", 0),
-                    text=chunk_data.get("text", ""),
-                    source=[
-                        Source(
-                            type="document",
-                            id=chunk_data.get("id", 0),
-                            url=chunk_data.get("url", ""),
-                        )
-                    ],
-                )
-                chunks.append(chunk)
+        return self._load_example_attachment()
+
+    @classmethod
+    @cache
+    def _load_example_attachment(cls) -> Attachment:
+        """读取示例检索结果并构建 Attachment，结果为只读共享对象"""
+        example_json = orjson.loads(_EXAMPLE_SEARCH_RESULT.read_bytes())
+        return cls._build_attachment(example_json.get("data", {}))
+
+    @classmethod
+    def _build_attachment(cls, attachment_data: dict) -> Attachment:
+        """由检索服务返回的数据构建 Attachment
+
+        上游数据可信时使用 `model_construct` 跳过 Pydantic 校验，
+        需要完整校验时将 `validate_search_result` 置为 True。
+        """
 
-            attachment = Attachment(doc=docs, chunks=chunks)
-            return attachment
+        def build(model: type[BaseModel]):
+            return model if cls.validate_search_result else model.model_construct
+
+        make_doc, make_author = build(Document), build(Author)
+        make_chunk, make_source = build(Chunk), build(Source)
+
+        docs = [
+            make_doc(
+                idx=doc_data.get("idx", 0),
+                title=doc_data.get("title", ""),
+                authors=[
+                    make_author(
+                        name=author.get("name", ""),
+                        institution=author.get("institution", ""),
+                    )
+                    for author in doc_data.get("authors", [])
+                ],
+                publicationDate=doc_data.get("publicationDate", ""),
+                language=doc_data.get("language", ""),
+                keywords=doc_data.get("keywords", []),
+                publisher=doc_data.get("publisher", ""),
+                journal=doc_data.get("journal", ""),
+            )
+            for doc_data in attachment_data.get("doc", [])
+        ]
+        chunks = [
+            make_chunk(
+                id=chunk_data.get("id", 0),
+                doc_id=chunk_data.get("doc_id", 0),
+                text=chunk_data.get("text", ""),
+                source=[
+                    make_source(
+                        type="document",
+                        id=chunk_data.get("id", 0),
+                        url=chunk_data.get("url", ""),
+                    )
+                ],
+            )
+            for chunk_data in attachment_data.get("chunks", [])
+        ]
+        return build(Attachment)(doc=docs, chunks=chunks)
 
     async def query_rewrite(self, query: str) -> AsyncGenerator[str, None]:
-        """对用户查询进行重写"""
-        prompt = QUERY_REWRITE_PROMPT.format(query=query)
-        messages = [Message(role="user", content=prompt)]
+        """对用户查询进行重写，相同查询在缓存有效期内直接返回上次的完整结果"""
+        key = hashlib.blake2b(query.encode(), digest_size=16).digest()
+        cached = _QUERY_REWRITE_CACHE.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt = query_rewrite_prompt(query)
+        messages = [Message.model_construct(role=_USER_ROLE, content=prompt)]
+        parts: list[str] = []
         async for response in self.llm_client.generate_stream(messages=messages):
+            parts.append(response)
             yield response
+        # 仅缓存完整输出；中途被终止时生成器提前关闭，不会执行到这里
+        if parts:
+            _QUERY_REWRITE_CACHE[key] = "".join(parts)
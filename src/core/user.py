@@ -4,6 +4,7 @@ from datetime import date
 from typing import List, Optional
 
 from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
 
 from src.database import get_users_collection
 
@@ -47,24 +48,18 @@ def save_user_profile(user_profile: UserProfile) -> str:
     # 使用 exclude_unset=True 来实现增量更新，只更新请求中明确提供的字段
     user_data = user_profile.model_dump(exclude_unset=True, mode="json")
 
-    # 使用 update_one 和 upsert=True 来实现“更新或插入”
-    result = collection.update_one(
+    # 使用 find_one_and_update 和 upsert=True 来实现“更新或插入”，
+    # 一次往返即可拿到新建或已有文档的 _id
+    document = collection.find_one_and_update(
         {"name": user_profile.name},
         {"$set": user_data},
-        upsert=True
+        projection={"_id": 1},  # 只需要返回 _id 字段
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
     )
 
-    if result.upserted_id:
-        # 如果是新插入的文档，直接返回新 ID
-        return str(result.upserted_id)
+    if document:
+        return str(document["_id"])
     else:
-        # 如果是更新的现有文档，需要查询以获取其 ID
-        updated_document = collection.find_one(
-            {"name": user_profile.name},
-            {"_id": 1}  # 只需要返回 _id 字段
-        )
-        if updated_document:
-            return str(updated_document["_id"])
-        else:
-            # 理论上这个分支不会被执行，但作为保险
-            raise RuntimeError(f"Failed to find user '{user_profile.name}' after update.")
+        # 理论上这个分支不会被执行，但作为保险
+        raise RuntimeError(f"Failed to find user '{user_profile.name}' after update.")
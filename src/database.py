@@ -4,8 +4,7 @@ from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
 
-# 直接从 config 模块导入配置实例
-from src.config import db_config
+from src.config import get_db_config
 
 _client: MongoClient | None = None
 _db: Database | None = None
@@ -15,9 +14,13 @@ def get_db() -> Database:
     """获取数据库实例，如果不存在则创建新的连接"""
     global _client, _db
     if _db is None:
+        db_config = get_db_config()
         if not db_config.mongo_uri or not db_config.db_name:
             raise ValueError("MongoDB URI and DB name must be set in config.yaml")
-        _client = MongoClient(db_config.mongo_uri)
+        # connect=False: 首次执行操作时才建立连接，避免阻塞调用方
+        _client = MongoClient(
+            db_config.mongo_uri, maxPoolSize=db_config.max_pool_size, connect=False
+        )
         _db = _client[db_config.db_name]
     return _db
 
@@ -25,4 +28,10 @@ def get_db() -> Database:
 def get_users_collection() -> Collection:
     """获取用于存储用户信息的 'users' 集合"""
     db = get_db()
-    return db["users"]
\ No newline at end of file
+    return db["users"]
+
+
+def ensure_indexes() -> None:
+    """创建业务所需索引，应用启动时调用一次"""
+    # save_user_profile 按 name 匹配用户，唯一索引避免全表扫描
+    get_users_collection().create_index("name", unique=True)
@@ -1,8 +1,13 @@
 """封装大模型相关接口"""
 
+import asyncio
+import importlib.util
 import os
 from collections.abc import AsyncGenerator
+from operator import attrgetter
+from typing import ClassVar
 
+import httpx
 import openai
 from loguru import logger
 from pydantic import BaseModel, ConfigDict, Field
@@ -10,6 +15,117 @@ from pydantic import BaseModel, ConfigDict, Field
 from src.config import BaseConfig
 from src.schema import Message
 
+# 一次取出消息的 role 与 content，比逐条属性访问更省解释器开销
+_role_content = attrgetter("role", "content")
+
+# 所有 LLMClient 共用的 HTTP 连接池；安装了 h2 时启用 HTTP/2，多路流式请求复用同一连接
+_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=60)
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class _SharedHttpClient:
+    """持有进程内共享的 httpx.AsyncClient"""
+
+    client: ClassVar[httpx.AsyncClient | None] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享的 httpx.AsyncClient，不存在或已关闭时重新创建"""
+    client = _SharedHttpClient.client
+    if client is None or client.is_closed:
+        client = _SharedHttpClient.client = httpx.AsyncClient(
+            limits=_HTTP_LIMITS, http2=_HTTP2_AVAILABLE, timeout=60
+        )
+    return client
+
+
+async def close_http_client() -> None:
+    """关闭共享的 HTTP 连接池，应用关闭时调用"""
+    client, _SharedHttpClient.client = _SharedHttpClient.client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def coalesce_stream(
+    source: AsyncGenerator[str, None], chunk_size: int = 16, flush_ms: float = 10
+) -> AsyncGenerator[str, None]:
+    """合并细碎的流式片段，减少下游逐条事件的序列化与传输开销。
+
+    首个片段立即输出以保证首字延迟；之后缓冲的文本达到 `chunk_size` 个字符，
+    或距缓冲区中最早片段已过 `flush_ms` 毫秒时输出一次。
+    `chunk_size <= 1` 或 `flush_ms <= 0` 时不做合并。
+
+    缓冲区为空时没有输出期限，直接等待下一个片段；缓冲区非空时需要在等待片段的同时计时，
+    这时才把读取包装成 Task（超时只触发输出而不能取消读取，否则会中断上游生成器），
+    即每个需要合并的片段多一次 Task 调度，换取下游事件数的减少。
+    调用方提前结束时取消仍在等待的读取，并关闭上游生成器以及时释放连接。
+    """
+    iterator = source.__aiter__()
+    # 等待中的下一个片段；超时只触发输出，不取消读取，下一轮继续等待同一个任务
+    pending: asyncio.Future | None = None
+    try:
+        if chunk_size <= 1 or flush_ms <= 0:
+            async for text in iterator:
+                yield text
+            return
+
+        try:
+            yield await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+
+        loop = asyncio.get_running_loop()
+        timeout = flush_ms / 1000
+        buffer: list[str] = []
+        size = 0
+        deadline = 0.0
+        while True:
+            if pending is None and not buffer:
+                try:
+                    text = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+            else:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                if buffer:
+                    timeout_left = max(deadline - loop.time(), 0)
+                    done, _ = await asyncio.wait((pending,), timeout=timeout_left)
+                    if not done:
+                        yield "".join(buffer)
+                        buffer.clear()
+                        size = 0
+                        continue
+                else:
+                    await asyncio.wait((pending,))
+
+                task, pending = pending, None
+                try:
+                    text = task.result()
+                except StopAsyncIteration:
+                    break
+            if not buffer:
+                deadline = loop.time() + timeout
+            buffer.append(text)
+            size += len(text)
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        # 调用方提前结束（如会话被终止）时，先取消仍在等待的读取，再关闭上游
+        if pending is not None:
+            if not pending.done():
+                pending.cancel()
+                await asyncio.wait((pending,))
+            if not pending.cancelled():
+                pending.exception()  # 标记异常已读取，避免 "never retrieved" 告警
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
 
 class OpenAIConfig(BaseConfig):
     """
@@ -19,6 +135,9 @@ class OpenAIConfig(BaseConfig):
     api_key: str
     api_url: str
     model_name: str
+    # 流式输出合并：缓冲达到的字符数 / 最长等待毫秒数，任一为 0 时关闭合并
+    stream_chunk_size: int = Field(default=16, ge=0)
+    stream_flush_ms: float = Field(default=10, ge=0)
 
     def __init__(self, **data):
         """支持两种初始化方式：
@@ -36,7 +155,10 @@ class OpenAIConfig(BaseConfig):
         api_url = os.getenv("OPENAI_API_BASE", data.get("api_url"))
         model_name = os.getenv("OPENAI_MODEL", data.get("model_name"))
 
-        super().__init__(api_key=api_key, api_url=api_url, model_name=model_name)
+        # 可选的流式合并参数，缺省时使用字段默认值
+        options = {k: data[k] for k in ("stream_chunk_size", "stream_flush_ms") if k in data}
+
+        super().__init__(api_key=api_key, api_url=api_url, model_name=model_name, **options)
 
     @classmethod
     def from_yaml(cls, path: str | None = None) -> "OpenAIConfig":
@@ -78,17 +200,29 @@ class LLMClient:
             api_key=self.openai_config.api_key,
             base_url=f"{self.openai_config.api_url}",
             timeout=60,
+            http_client=get_http_client(),
         )
         self.default_config = LLMGenerationConfig(
             model=self.openai_config.model_name,
         )
+        self._build_call_params()
+
+    def _build_call_params(self) -> None:
+        """预先序列化生成参数，避免每次请求重复 model_copy + model_dump"""
+        base = self.default_config.model_dump(exclude_none=True)
+        self._params_stream = {**base, "stream": True}
+        self._params_nostream = {**base, "stream": False}
+
+    def update_generation_config(self, **kwargs) -> None:
+        """更新默认生成参数（如 temperature、max_tokens），并刷新缓存的调用参数"""
+        self.default_config = LLMGenerationConfig(**{**self.default_config.model_dump(), **kwargs})
+        self._build_call_params()
 
     async def generate(self, messages: list[Message]) -> str:
         openai_messages = self._convert_messages(messages)
-        config = self.default_config.model_copy(update={"stream": False})
 
         try:
-            call_params = config.model_dump(exclude_none=True)
+            call_params = self._params_nostream
 
             response = await self.client.chat.completions.create(
                 messages=openai_messages, **call_params
@@ -100,28 +234,34 @@ class LLMClient:
             logger.error(f"调用 OpenAI API 时发生错误: {e}")
             raise
 
-    async def generate_stream(self, messages: list[Message]) -> AsyncGenerator[str, None]:
-        query = self._convert_messages(messages)
-        config = self.default_config.model_copy(update={"stream": True})
-        stream = None
+    def generate_stream(self, messages: list[Message]) -> AsyncGenerator[str, None]:
+        """流式生成回答，细碎的增量片段按配置合并后输出"""
+        return coalesce_stream(
+            self._stream_deltas(messages),
+            chunk_size=self.openai_config.stream_chunk_size,
+            flush_ms=self.openai_config.stream_flush_ms,
+        )
 
-        try:
-            call_params = config.model_dump(exclude_none=True)
-            stream = await self.client.chat.completions.create(messages=query, **call_params)
+    async def _stream_deltas(self, messages: list[Message]) -> AsyncGenerator[str, None]:
+        query = self._convert_messages(messages)
+        call_params = self._params_stream
 
+        stream = await self.client.chat.completions.create(messages=query, **call_params)
+        # 退出上下文（正常结束、异常或被提前关闭）时由 SDK 关闭底层响应
+        async with stream:
             async for chunk in stream:
-                if chunk.choices and chunk.choices[0].delta.content is not None:
-                    yield chunk.choices[0].delta.content
-        finally:
-            try:
-                if stream is not None:
-                    await stream.close()
-            except Exception:
-                pass
+                # 每个片段只取一次 choices / content
+                choices = chunk.choices
+                if choices:
+                    content = choices[0].delta.content
+                    if content is not None:
+                        yield content
 
     def _convert_messages(self, messages: list[Message]) -> list[dict]:
         """统一消息格式，去除 Attachment"""
-        return [{"role": message.role, "content": message.content} for message in messages]
+        return [
+            {"role": role, "content": content} for role, content in map(_role_content, messages)
+        ]
 
     def _generate_message(self, prompt: str, system_prompt: str = None) -> Message:
         return Message(
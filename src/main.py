@@ -1,5 +1,7 @@
 """FastAPI 应用入口"""
 
+import asyncio
+import os
 from contextlib import asynccontextmanager
 import logging
 
@@ -7,44 +9,69 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.core.api import router as api_router
-from src.cache import LocalCache, RedisCache
-from src.config import BaseConfig
+from src.core.chat import ChatInterface, ChatService, RAGService
+from src.cache import LocalCache, RedisCache, RedisConfig
+from src.config import get_cors_config
+from src.database import ensure_indexes
+from src.llm import LLMClient, OpenAIConfig, close_http_client
 
 logger = logging.getLogger(__name__)
 
 
-class RedisConfig(BaseConfig):
-    yaml_section = "redis"
-    host: str = "localhost"
-    port: int = 6379
+async def _ensure_db_indexes() -> None:
+    try:
+        await asyncio.to_thread(ensure_indexes)
+    except Exception as e:
+        logger.warning(f"Failed to ensure MongoDB indexes: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
         config = RedisConfig.from_yaml()
-        app.state.cache = RedisCache(config=config)
+        app.state.cache = RedisCache.get_or_create(config)
     except Exception as e:
         logger.warning(f"Failed to initialize RedisCache: {e}, falling back to LocalCache")
         app.state.cache = LocalCache()
+    # 配置只在启动时加载一次，请求路径上不再读取 config.yaml
+    try:
+        app.state.openai_config = OpenAIConfig()
+        app.state.llm_client = LLMClient(config=app.state.openai_config)
+    except Exception as e:
+        logger.warning(f"Failed to initialize LLMClient: {e}")
+        app.state.llm_client = None
+    # 服务本身无状态，启动时各创建一次供所有请求复用
+    app.state.chat_service = ChatService(cache=app.state.cache, llm_client=app.state.llm_client)
+    app.state.rag_service = RAGService(cache=app.state.cache, llm_client=app.state.llm_client)
+    # 索引创建放到后台线程，MongoDB 不可用时不阻塞启动
+    index_task = asyncio.create_task(_ensure_db_indexes())
     try:
         yield
     finally:
+        index_task.cancel()
+        # 先停止终止通知的订阅，再关闭其所依赖的缓存连接
+        await ChatInterface.stop_halt_listener()
         if hasattr(app.state, "cache"):
             await app.state.cache.close()
+        await close_http_client()
+
+
+class _ConfiguredCORSMiddleware(CORSMiddleware):
+    """允许的来源统一由 config.yaml 的 `cors` 节提供。
+
+    中间件在应用首次收到请求（含 lifespan 启动）时才实例化，
+    导入本模块时不读取配置文件。
+    """
+
+    def __init__(self, app, **kwargs):
+        super().__init__(app, allow_origins=get_cors_config().origins, **kwargs)
 
 
 app = FastAPI(title="demo-rag-backend", lifespan=lifespan)
 
 # 配置 CORS 中间件
-origins = [
-    "http://localhost:8080", 
-    "http://127.0.0.1:8080", 
-]
-
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
+    _ConfiguredCORSMiddleware,
     allow_credentials=True,
     allow_methods=["*"],  
     allow_headers=["*"],  
@@ -54,9 +81,17 @@ app.include_router(api_router)
 if __name__ == "__main__":
     import uvicorn
 
+    # 生产启动：不启用热重载（开发请用 `make run`）。"auto" 在已安装时选用 uvloop 事件循环
+    # 与 httptools 解析器，Windows 等没有 uvloop 的平台回退到 asyncio；
+    # 多 worker 时终止通知依赖 Redis 发布/订阅跨进程转发
     uvicorn.run(
         "src.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=False,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="auto",
+        http="auto",
+        ws="none",
+        lifespan="on",
     )
@@ -1,10 +1,11 @@
 """数据模型定义"""
 
-from datetime import datetime
+import time
 from enum import Enum
-from typing import Any, Literal, Union
+from typing import Any, ClassVar, Literal
 
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Author(BaseModel):
@@ -77,6 +78,10 @@ class ChatStatus(Enum):
     TERMINATED = -1
 
 
+def _event_head(event: ResponseEventType) -> bytes:
+    return b'{"event":' + orjson.dumps(event.value) + b',"data":'
+
+
 class ChatResponse(BaseModel):
     """会话响应基类，提供如下的基本结构，data 由继承的事件响应注入
 
@@ -85,14 +90,35 @@ class ChatResponse(BaseModel):
     ```
 
     使用 Pydantic 的 model_dump() 和 model_dump_json() 来序列化和反序列化
-    方便起见，流式输出推荐用 to_jsonl() 来输出单行 JSON 格式
+    方便起见，流式输出推荐用 to_jsonl() 来输出单行 JSON 格式（UTF-8 bytes）
     """
 
     event: ResponseEventType
     data: Any
 
-    def to_jsonl(self):
-        return self.model_dump_json() + "\n"
+    # 子类定义时根据默认事件类型预先生成的 `{"event":"...","data":` 前缀
+    _jsonl_event: ClassVar[ResponseEventType | None] = None
+    _jsonl_head: ClassVar[bytes] = b""
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        event = cls.model_fields["event"].default
+        if isinstance(event, ResponseEventType):
+            cls._jsonl_event = event
+            cls._jsonl_head = _event_head(event)
+
+    def to_jsonl(self) -> bytes:
+        # 直接由 pydantic-core 序列化为 bytes，省去 str 解码与响应时的再次编码
+        data = self.data
+        if self.event is self._jsonl_event and isinstance(data, BaseModel):
+            # 事件前缀已预先生成，只需序列化 data
+            return self._jsonl_head + data.__pydantic_serializer__.to_json(data) + b"}\n"
+        return self.__pydantic_serializer__.to_json(self) + b"\n"
+
+
+# 流式事件中的数据模型创建后即被序列化，不需要修改，也不接受多余字段
+_STREAM_DATA_CONFIG = ConfigDict(extra="forbid", frozen=True)
 
 
 class LLMResponse(BaseModel):
@@ -100,21 +126,42 @@ class LLMResponse(BaseModel):
 
     content: str
 
+    model_config = _STREAM_DATA_CONFIG
+
 
 class InitData(BaseModel):
     """会话初始化数据"""
 
     chat_id: str
     message_id: str
-    created_at: float = Field(default_factory=lambda: datetime.now().timestamp())
+    created_at: float = Field(default_factory=time.time)
+
+    model_config = _STREAM_DATA_CONFIG
 
 
 class EndData(BaseModel):
     """会话终止数据"""
 
-    completion_time: float = Field(default_factory=lambda: datetime.now().timestamp())
+    completion_time: float = Field(default_factory=time.time)
     end_reason: int = Field(default=0, description="0: 正常结束, -1: 提前退出")
 
+    model_config = _STREAM_DATA_CONFIG
+
+
+_ANSWER_HEAD = _event_head(ResponseEventType.ANSWER) + b'{"content":'
+_QUERY_REWRITE_HEAD = _event_head(ResponseEventType.QUERY_REWRITE) + b'{"content":'
+_LLM_RESPONSE_TAIL = b"}}\n"
+
+
+def answer_jsonl(content: str) -> bytes:
+    """流式热路径：直接拼接 Answer 事件的单行 JSON，无需构造 AnswerResponse"""
+    return _ANSWER_HEAD + orjson.dumps(content) + _LLM_RESPONSE_TAIL
+
+
+def query_rewrite_jsonl(content: str) -> bytes:
+    """流式热路径：直接拼接 Query Rewrite 事件的单行 JSON"""
+    return _QUERY_REWRITE_HEAD + orjson.dumps(content) + _LLM_RESPONSE_TAIL
+
 
 class InitResponse(ChatResponse):
     event: ResponseEventType = ResponseEventType.INIT
@@ -133,6 +180,11 @@ class QueryRewriteResponse(ChatResponse):
     def from_text(cls, content: str) -> "QueryRewriteResponse":
         return cls(data=LLMResponse(content=content))
 
+    def to_jsonl(self) -> bytes:
+        if self.event is not ResponseEventType.QUERY_REWRITE:
+            return super().to_jsonl()
+        return query_rewrite_jsonl(self.data.content)
+
 
 class SearchResponse(ChatResponse):
     event: ResponseEventType = ResponseEventType.SEARCH
@@ -140,7 +192,8 @@ class SearchResponse(ChatResponse):
 
     @classmethod
     def from_attachment(cls, attachment: Attachment) -> "SearchResponse":
-        return cls(data=attachment)
+        """包装已构建的检索结果，不再逐层校验嵌套的文档与片段"""
+        return cls.model_construct(data=attachment)
 
 
 class AnswerResponse(ChatResponse):
@@ -152,18 +205,31 @@ class AnswerResponse(ChatResponse):
         """根据文本内容构建回答响应"""
         return cls(data=LLMResponse(content=content))
 
+    def to_jsonl(self) -> bytes:
+        if self.event is not ResponseEventType.ANSWER:
+            return super().to_jsonl()
+        return answer_jsonl(self.data.content)
+
 
 class EndResponse(ChatResponse):
     event: ResponseEventType = ResponseEventType.END
     data: EndData
 
     @classmethod
-    def from_status(cls, status: Union[int, str, "ChatStatus"]) -> "EndResponse":
+    def from_status(cls, status: int | str | ChatStatus) -> "EndResponse":
         """根据会话状态生成结束响应"""
-        if isinstance(status, str):
-            end_reason = int(status)
-        elif isinstance(status, int):
-            end_reason = status
-        else:  # ChatStatus
-            end_reason = status.value
-        return cls(data=EndData(end_reason=end_reason))
+        coerce = _END_REASON_COERCE.get(type(status))
+        if coerce is None:  # 子类等非精确类型，按 isinstance 回退匹配
+            coerce = next(
+                (f for t, f in _END_REASON_COERCE.items() if isinstance(status, t)),
+                _END_REASON_COERCE[ChatStatus],
+            )
+        return cls(data=EndData(end_reason=coerce(status)))
+
+
+# 缓存中的会话状态可能是 int（LocalCache）、str（Redis）或 ChatStatus，按类型直接查表转换
+_END_REASON_COERCE = {
+    int: lambda status: status,
+    str: int,
+    ChatStatus: lambda status: status.value,
+}
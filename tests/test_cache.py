@@ -0,0 +1,30 @@
+from src.cache import LocalCache
+
+
+async def test_local_prefix_keys_after_set_and_delete():
+    cache = LocalCache()
+    for key in ["chat:2", "user:1", "chat:1", "chat", "chat:10", "chau"]:
+        await cache.set(key, 1)
+
+    assert await cache.keys("chat:*") == ["chat:1", "chat:10", "chat:2"]
+    assert await cache.keys("chat*") == ["chat", "chat:1", "chat:10", "chat:2"]
+
+    await cache.delete("chat:10")
+    await cache.delete("missing")
+    await cache.set("chat:1", 2)  # 覆盖已有 key 不应重复索引
+    assert await cache.keys("chat:*") == ["chat:1", "chat:2"]
+    assert await cache.keys("nothing*") == []
+
+
+async def test_local_exact_and_all_keys():
+    cache = LocalCache()
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+
+    assert await cache.keys("a") == ["a"]
+    assert await cache.keys("c") == []
+    assert sorted(await cache.keys()) == ["a", "b"]
+
+    await cache.close()
+    assert await cache.keys("*") == []
+    assert await cache.keys("a*") == []
@@ -0,0 +1,218 @@
+import asyncio
+
+import orjson
+
+from src.cache import LocalCache, PubSubCache
+from src.core import chat
+from src.core.chat import ChatInterface, ChatService, RAGService
+from src.schema import ChatStatus, Message
+
+
+class FakeLLMClient:
+    """逐个产出 token 的假 LLM 客户端"""
+
+    def __init__(self, count: int = 10):
+        self.count = count
+
+    async def generate_stream(self, messages):
+        for i in range(self.count):
+            await asyncio.sleep(0)
+            yield f"t{i}"
+
+
+def _events(chunks: list[bytes]) -> list[dict]:
+    return [orjson.loads(chunk) for chunk in chunks]
+
+
+def _service(count: int = 10) -> ChatService:
+    return ChatService(cache=LocalCache(), llm_client=FakeLLMClient(count))
+
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+async def test_stream_completes():
+    service = _service(3)
+    events = _events([chunk async for chunk in service.generate("c1", "m1", MESSAGES)])
+
+    assert [e["event"] for e in events] == ["Init", "Answer", "Answer", "Answer", "End"]
+    assert events[-1]["data"]["end_reason"] == ChatStatus.COMPLETED.value
+    assert await service.cache.get("c1") == ChatStatus.COMPLETED.value
+    assert "c1" not in ChatInterface._halt_events
+
+
+async def test_halt_right_after_init():
+    service = _service()
+    stream = service.generate("c1", "m1", MESSAGES)
+    chunks = [await stream.__anext__()]
+    await service.halt_chat("c1")
+    chunks += [chunk async for chunk in stream]
+
+    events = _events(chunks)
+    assert [e["event"] for e in events] == ["Init", "End"]
+    assert events[-1]["data"]["end_reason"] == ChatStatus.TERMINATED.value
+    assert "c1" not in ChatInterface._halt_events
+
+
+async def test_halt_during_streaming():
+    service = _service()
+    chunks = []
+    async for chunk in service.generate("c1", "m1", MESSAGES):
+        chunks.append(chunk)
+        if len(chunks) == 3:
+            await service.halt_chat("c1")
+
+    events = _events(chunks)
+    assert [e["event"] for e in events] == ["Init", "Answer", "Answer", "End"]
+    assert events[-1]["data"]["end_reason"] == ChatStatus.TERMINATED.value
+
+
+async def test_halt_before_listener_seeded_from_cache():
+    # 模拟其他进程写入的终止状态：本进程的事件未被置位，开始生成前由缓存状态补齐
+    service = _service()
+    stream = service.generate("c1", "m1", MESSAGES)
+    chunks = [await stream.__anext__()]
+    await service.cache.set("c1", ChatStatus.TERMINATED.value)
+    chunks += [chunk async for chunk in stream]
+
+    assert [e["event"] for e in _events(chunks)] == ["Init", "End"]
+
+
+async def test_close_at_init_unregisters_halt_event():
+    service = _service()
+    stream = service.generate("c1", "m1", MESSAGES)
+    await stream.__anext__()
+    assert "c1" in ChatInterface._halt_events
+
+    await stream.aclose()
+    assert "c1" not in ChatInterface._halt_events
+
+
+async def test_halt_then_restart_same_chat_id():
+    service = _service(3)
+    first = service.generate("c1", "m1", MESSAGES)
+    first_chunks = [await first.__anext__(), await first.__anext__()]
+    await service.halt_chat("c1")
+
+    # 被终止的生成尚未结束时，同一会话重新生成不应沿用已置位的终止事件
+    second = service.generate("c1", "m2", MESSAGES)
+    second_chunks = [await second.__anext__()]
+    first_chunks += [chunk async for chunk in first]
+    assert "c1" in ChatInterface._halt_events
+    assert await service.cache.get("c1") == ChatStatus.ACTIVE.value
+
+    second_chunks += [chunk async for chunk in second]
+    first_events, second_events = _events(first_chunks), _events(second_chunks)
+    assert [e["event"] for e in first_events] == ["Init", "Answer", "End"]
+    assert first_events[-1]["data"]["end_reason"] == ChatStatus.TERMINATED.value
+    assert [e["event"] for e in second_events] == ["Init", "Answer", "Answer", "Answer", "End"]
+    assert second_events[-1]["data"]["end_reason"] == ChatStatus.COMPLETED.value
+    assert await service.cache.get("c1") == ChatStatus.COMPLETED.value
+    assert "c1" not in ChatInterface._halt_events
+
+
+async def test_restarted_chat_can_be_halted():
+    service = _service()
+    first = service.generate("c1", "m1", MESSAGES)
+    await first.__anext__()
+    await service.halt_chat("c1")
+    first_chunks = [chunk async for chunk in first]
+
+    chunks = []
+    async for chunk in service.generate("c1", "m2", MESSAGES):
+        chunks.append(chunk)
+        if len(chunks) == 2:
+            await service.halt_chat("c1")
+
+    assert [e["event"] for e in _events(first_chunks)] == ["End"]
+    events = _events(chunks)
+    assert [e["event"] for e in events] == ["Init", "Answer", "End"]
+    assert events[-1]["data"]["end_reason"] == ChatStatus.TERMINATED.value
+
+
+class FlakyPubSubCache(LocalCache, PubSubCache):
+    """首次订阅即失败、之后从队列读取通知的假缓存"""
+
+    def __init__(self):
+        super().__init__()
+        self.subscriptions = 0
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+    async def publish(self, channel, message):
+        await self.messages.put((channel, message))
+
+    async def psubscribe(self, pattern):
+        self.subscriptions += 1
+        if self.subscriptions == 1:
+            raise ConnectionError("connection lost")
+        while True:
+            yield await self.messages.get()
+
+
+async def test_halt_listener_resubscribes_after_error(monkeypatch):
+    monkeypatch.setattr(ChatInterface, "halt_listener_retry_delay", 0)
+    cache = FlakyPubSubCache()
+    # 模拟其他进程写入的终止状态，只能在重新订阅前按缓存补齐
+    await cache.set("c1", ChatStatus.TERMINATED.value)
+    first = ChatInterface._halt_events["c1"] = asyncio.Event()
+    second = ChatInterface._halt_events["c2"] = asyncio.Event()
+
+    listener = asyncio.create_task(ChatInterface._listen_halts(cache))
+    try:
+        await asyncio.wait_for(first.wait(), timeout=1)
+        await cache.publish("halt:c2", ChatStatus.TERMINATED.value)
+        await asyncio.wait_for(second.wait(), timeout=1)
+        assert cache.subscriptions == 2
+    finally:
+        listener.cancel()
+        ChatInterface._halt_events.clear()
+
+
+def test_remove_think():
+    assert RAGService._remove_think("<think>a</think>answer") == "answer"
+    assert RAGService._remove_think("a</THINK>b</think>c") == "b</think>c"
+    assert RAGService._remove_think("no think") == "no think"
+
+
+class CountingLLMClient(FakeLLMClient):
+    def __init__(self, count: int = 3):
+        super().__init__(count)
+        self.calls = 0
+
+    async def generate_stream(self, messages):
+        self.calls += 1
+        async for token in super().generate_stream(messages):
+            yield token
+
+
+async def test_query_rewrite_cached_after_full_output():
+    chat._QUERY_REWRITE_CACHE.clear()
+    llm = CountingLLMClient()
+    service = RAGService(cache=LocalCache(), llm_client=llm)
+
+    assert [part async for part in service.query_rewrite("q")] == ["t0", "t1", "t2"]
+    assert [part async for part in service.query_rewrite("q")] == ["t0t1t2"]
+    assert llm.calls == 1
+
+
+async def test_query_rewrite_not_cached_when_closed_early():
+    chat._QUERY_REWRITE_CACHE.clear()
+    llm = CountingLLMClient()
+    service = RAGService(cache=LocalCache(), llm_client=llm)
+
+    stream = service.query_rewrite("q")
+    assert await stream.__anext__() == "t0"
+    await stream.aclose()
+
+    assert [part async for part in service.query_rewrite("q")] == ["t0", "t1", "t2"]
+    assert llm.calls == 2
+
+
+async def test_build_attachment_matches_validated(monkeypatch):
+    data = orjson.loads(chat._EXAMPLE_SEARCH_RESULT.read_bytes())["data"]
+    trusted = RAGService._build_attachment(data)
+    monkeypatch.setattr(RAGService, "validate_search_result", True)
+    validated = RAGService._build_attachment(data)
+
+    assert trusted.model_dump() == validated.model_dump()
+    assert trusted.chunks and trusted.doc
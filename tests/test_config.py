@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from src import config
+from src.config import BaseConfig, CORSConfig
+
+
+class SampleConfig(BaseConfig):
+    host: str = "localhost"
+    port: int = 0
+
+
+def _write(path, text: str, mtime: int) -> None:
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_yaml_edit_picked_up_after_mtime_change(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    _write(cfg, "sample:\n  host: a\n", mtime=1_000)
+    assert SampleConfig.from_yaml(str(cfg)).host == "a"
+
+    _write(cfg, "sample:\n  host: b\n", mtime=2_000)
+    assert SampleConfig.from_yaml(str(cfg)).host == "b"
+    # 同一路径只保留一份缓存，修改后被最新解析结果替换
+    assert config._YAML_CACHE[cfg.resolve()] == (2_000, {"sample": {"host": "b"}})
+
+
+def test_yaml_cached_while_mtime_unchanged(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    _write(cfg, "sample:\n  host: a\n", mtime=1_000)
+    assert SampleConfig.from_yaml(str(cfg)).host == "a"
+
+    # 内容改变但修改时间不变时沿用缓存
+    _write(cfg, "sample:\n  host: b\n", mtime=1_000)
+    assert SampleConfig.from_yaml(str(cfg)).host == "a"
+
+
+def test_missing_file_returns_empty_dict(tmp_path):
+    assert SampleConfig.from_yaml_dict(str(tmp_path / "missing.yaml")) == {}
+
+
+class OtherConfig(BaseConfig):
+    name: str = ""
+
+
+def test_only_model_fields_are_kept(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    _write(cfg, "sample:\n  host: a\n  port: 1\n  extra: x\nname: flat\nhost: top\n", mtime=1_000)
+
+    assert SampleConfig.from_yaml_dict(str(cfg)) == {"host": "a", "port": 1}
+    # 无同名节时读取顶层平铺字段
+    assert OtherConfig.from_yaml_dict(str(cfg)) == {"name": "flat"}
+
+
+def test_allowed_fields_cached_per_class():
+    assert SampleConfig._allowed_fields() == frozenset({"host", "port"})
+    assert OtherConfig._allowed_fields() == frozenset({"name"})
+    assert SampleConfig._allowed_fields() is SampleConfig._allowed_fields()
+
+
+@pytest.mark.parametrize("origins", [["http://localhost:8080", "https://example.com"], ["*"], []])
+def test_cors_origins_accepted(origins):
+    assert CORSConfig(origins=origins).origins == origins
+
+
+@pytest.mark.parametrize("origin", ["example.com", "ftp://example.com", "ws://a", ""])
+def test_cors_origins_rejected(origin):
+    with pytest.raises(ValidationError, match="invalid CORS origin"):
+        CORSConfig(origins=["http://localhost:8080", origin])
+
+
+def test_cors_config_from_yaml_section(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    _write(cfg, "cors:\n  origins:\n    - https://a.example\n", mtime=1_000)
+    assert CORSConfig.from_yaml(str(cfg)).origins == ["https://a.example"]
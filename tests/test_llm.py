@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from src.llm import coalesce_stream
+
+
+async def _source(items, delay=0.0):
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+
+
+async def test_first_token_passes_through():
+    stream = coalesce_stream(_source(["a", "b", "c"]), chunk_size=16, flush_ms=1000)
+    assert await stream.__anext__() == "a"
+    await stream.aclose()
+
+
+async def test_flush_on_size():
+    tokens = ["x"] + ["abcd"] * 8
+    stream = coalesce_stream(_source(tokens), chunk_size=8, flush_ms=1000)
+    result = [chunk async for chunk in stream]
+    assert result == ["x", "abcdabcd", "abcdabcd", "abcdabcd", "abcdabcd"]
+
+
+async def test_flush_on_timeout():
+    async def slow():
+        yield "a"
+        yield "b"
+        yield "c"
+        await asyncio.sleep(0.2)
+        yield "d"
+
+    result = [chunk async for chunk in coalesce_stream(slow(), chunk_size=16, flush_ms=20)]
+    assert result == ["a", "bc", "d"]
+
+
+async def test_remaining_buffer_flushed_on_end():
+    result = [chunk async for chunk in coalesce_stream(_source(["a", "b", "c"]), 16, 1000)]
+    assert result == ["a", "bc"]
+
+
+async def test_disabled_passes_every_token():
+    tokens = ["a", "b", "c"]
+    assert [chunk async for chunk in coalesce_stream(_source(tokens), 0, 10)] == tokens
+    assert [chunk async for chunk in coalesce_stream(_source(tokens), 16, 0)] == tokens
+
+
+async def test_empty_source():
+    assert [chunk async for chunk in coalesce_stream(_source([]))] == []
+
+
+async def test_early_close_cancels_pending_read():
+    closed = asyncio.Event()
+
+    async def hanging():
+        try:
+            yield "a"
+            yield "b"
+            await asyncio.sleep(10)
+            yield "c"
+        finally:
+            closed.set()
+
+    stream = coalesce_stream(hanging(), chunk_size=16, flush_ms=10)
+    assert await stream.__anext__() == "a"
+    # "b" 只能等超时输出，此时下一次读取仍挂起在 sleep 中
+    assert await stream.__anext__() == "b"
+    await stream.aclose()
+    await asyncio.wait_for(closed.wait(), timeout=1)
+
+
+async def test_source_error_propagates():
+    async def failing():
+        yield "a"
+        raise RuntimeError("boom")
+
+    stream = coalesce_stream(failing())
+    assert await stream.__anext__() == "a"
+    with pytest.raises(RuntimeError, match="boom"):
+        await stream.__anext__()
+
+
+class TrackedSource:
+    """记录是否被关闭的上游片段流"""
+
+    def __init__(self, items):
+        self.items = items
+        self.closed = False
+
+    async def stream(self):
+        try:
+            for item in self.items:
+                await asyncio.sleep(0)
+                yield item
+        finally:
+            self.closed = True
+
+
+@pytest.mark.parametrize(("chunk_size", "flush_ms"), [(16, 1000), (0, 10)])
+async def test_early_close_closes_source(chunk_size, flush_ms):
+    source = TrackedSource(["a", "b", "c"])
+    stream = coalesce_stream(source.stream(), chunk_size=chunk_size, flush_ms=flush_ms)
+    assert await stream.__anext__() == "a"
+    assert not source.closed
+
+    await stream.aclose()
+    assert source.closed
+
+
+async def test_close_after_size_flush_closes_source():
+    source = TrackedSource(["x", "abcd", "abcd", "abcd"])
+    stream = coalesce_stream(source.stream(), chunk_size=8, flush_ms=1000)
+    assert [await stream.__anext__(), await stream.__anext__()] == ["x", "abcdabcd"]
+
+    await stream.aclose()
+    assert source.closed
@@ -0,0 +1,96 @@
+import orjson
+import pytest
+
+from src.schema import (
+    AnswerResponse,
+    Attachment,
+    Author,
+    ChatResponse,
+    ChatStatus,
+    Chunk,
+    Document,
+    EndData,
+    EndResponse,
+    InitResponse,
+    LLMResponse,
+    QueryRewriteResponse,
+    ResponseEventType,
+    SearchResponse,
+    Source,
+    answer_jsonl,
+    query_rewrite_jsonl,
+)
+
+TRICKY_TEXTS = ["", "plain", '引号 " 反斜杠 \\ 换行\n制表\t', "emoji 😀   \x00 </think>"]
+
+ATTACHMENT = Attachment(
+    doc=[
+        Document(
+            idx=1,
+            title='标题 "1"',
+            authors=[Author(name="张三", institution="某大学")],
+            publicationDate="2024-01-01",
+            language="zh",
+            keywords=["a", "b"],
+            publisher="p",
+            journal="j",
+        )
+    ],
+    chunks=[Chunk(id=1, doc_id=1, text="片段\n", source=[Source(type="document", id=1, url="u")])],
+)
+
+
+def _expected(response: ChatResponse) -> bytes:
+    return response.model_dump_json().encode() + b"\n"
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        InitResponse.create(chat_id="c1", message_id="m1"),
+        SearchResponse(data=ATTACHMENT),
+        EndResponse(data=EndData(end_reason=-1)),
+        *[QueryRewriteResponse.from_text(text) for text in TRICKY_TEXTS],
+        *[AnswerResponse.from_text(text) for text in TRICKY_TEXTS],
+    ],
+)
+def test_to_jsonl_matches_model_dump_json(response):
+    assert response.to_jsonl() == _expected(response)
+
+
+@pytest.mark.parametrize("text", TRICKY_TEXTS)
+def test_jsonl_templates_match_models(text):
+    assert answer_jsonl(text) == _expected(AnswerResponse.from_text(text))
+    assert query_rewrite_jsonl(text) == _expected(QueryRewriteResponse.from_text(text))
+    assert orjson.loads(answer_jsonl(text))["data"]["content"] == text
+
+
+def test_to_jsonl_with_overridden_event():
+    # 事件类型与默认值不同时不能使用预先生成的前缀
+    response = AnswerResponse(event=ResponseEventType.QUERY_REWRITE, data=LLMResponse(content="x"))
+    assert response.to_jsonl() == _expected(response)
+
+
+@pytest.mark.parametrize(
+    ("status", "end_reason"),
+    [
+        (0, 0),
+        (-1, -1),
+        ("0", 0),
+        ("-1", -1),
+        (ChatStatus.COMPLETED, 0),
+        (ChatStatus.TERMINATED, -1),
+        (True, 1),  # bool 是 int 的子类，走 isinstance 回退
+    ],
+)
+def test_end_response_from_status(status, end_reason):
+    response = EndResponse.from_status(status)
+    assert response.event is ResponseEventType.END
+    assert response.data.end_reason == end_reason
+
+
+def test_search_response_from_attachment_skips_validation():
+    response = SearchResponse.from_attachment(ATTACHMENT)
+    assert response.data is ATTACHMENT
+    assert response.event is ResponseEventType.SEARCH
+    assert response.to_jsonl() == _expected(SearchResponse(data=ATTACHMENT))
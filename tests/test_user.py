@@ -0,0 +1,56 @@
+import pytest
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from src.core import user
+from src.core.user import UserProfile, save_user_profile
+
+
+class StubCollection:
+    """记录 find_one_and_update 调用参数的假集合"""
+
+    def __init__(self, document):
+        self.document = document
+        self.calls = []
+
+    def find_one_and_update(self, filter, update, **kwargs):
+        self.calls.append((filter, update, kwargs))
+        return self.document
+
+
+def _use_collection(monkeypatch, document) -> StubCollection:
+    collection = StubCollection(document)
+    monkeypatch.setattr(user, "get_users_collection", lambda: collection)
+    return collection
+
+
+def test_save_user_profile_upserts_only_set_fields(monkeypatch):
+    oid = ObjectId()
+    collection = _use_collection(monkeypatch, {"_id": oid})
+
+    profile = UserProfile(name="alice", city="Beijing", birthday="2000-01-02")
+    assert save_user_profile(profile) == str(oid)
+
+    [(filter, update, kwargs)] = collection.calls
+    assert filter == {"name": "alice"}
+    assert update == {"$set": {"name": "alice", "city": "Beijing", "birthday": "2000-01-02"}}
+    assert kwargs == {
+        "projection": {"_id": 1},
+        "upsert": True,
+        "return_document": ReturnDocument.AFTER,
+    }
+
+
+def test_save_user_profile_requires_name(monkeypatch):
+    collection = _use_collection(monkeypatch, {"_id": ObjectId()})
+
+    with pytest.raises(ValueError):
+        save_user_profile(UserProfile(city="Beijing"))
+    assert collection.calls == []
+
+
+def test_save_user_profile_without_document(monkeypatch):
+    _use_collection(monkeypatch, None)
+
+    with pytest.raises(RuntimeError):
+        save_user_profile(UserProfile(name="alice"))